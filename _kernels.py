@@ -0,0 +1,250 @@
+"""
+Compiled Kernels for the Energetic Epicenter Detector
+-----------------------------------------------------
+Per-frame hot loops compiled with Numba, plus a CUDA kernel compiled with
+CuPy for the GPU path. Both are optional dependencies: when Numba is not
+installed ``HAVE_NUMBA`` is False and the detector uses its NumPy
+implementation; when CuPy is not installed ``HAVE_CUPY`` is False and the
+CUDA path uses OpenCV's CUDA arithmetic.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import numba
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+try:
+    import cupy
+    HAVE_CUPY = True
+except ImportError:
+    HAVE_CUPY = False
+
+
+if HAVE_NUMBA:
+
+    @njit(inline='always')
+    def _metrics_at(u, v, y, x, x0, x1, y0, y1, inv_dx, inv_dy):
+        """Compute divergence, curl and strain energy at (y, x)."""
+        du_dx = (u[y, x1] - u[y, x0]) * inv_dx
+        dv_dx = (v[y, x1] - v[y, x0]) * inv_dx
+        du_dy = (u[y1, x] - u[y0, x]) * inv_dy
+        dv_dy = (v[y1, x] - v[y0, x]) * inv_dy
+
+        shear = du_dy + dv_dx
+        return (
+            du_dx + dv_dy,
+            dv_dx - du_dy,
+            np.sqrt(du_dx * du_dx + dv_dy * dv_dy + 0.5 * shear * shear),
+        )
+
+    @njit(inline='always')
+    def _store_metrics(u, v, div, curl, strain, y, x, x0, x1, y0, y1, inv_dx, inv_dy):
+        """Store the metrics at (y, x)."""
+        d, c, e = _metrics_at(u, v, y, x, x0, x1, y0, y1, inv_dx, inv_dy)
+        div[y, x] = d
+        curl[y, x] = c
+        strain[y, x] = e
+
+    @njit(inline='always')
+    def _accumulate_metrics(u, v, weight, div, curl, energy,
+                            y, x, x0, x1, y0, y1, inv_dx, inv_dy):
+        """Add the weighted metrics at (y, x) to the accumulators."""
+        d, c, e = _metrics_at(u, v, y, x, x0, x1, y0, y1, inv_dx, inv_dy)
+        div[y, x] += weight * d
+        curl[y, x] += weight * c
+        energy[y, x] += weight * e
+
+    @njit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+    def fuse_metrics(u, v, div, curl, strain):
+        """
+        Compute divergence, curl and strain energy in one sweep over the flow.
+
+        Uses central differences in the interior and one-sided differences at
+        the borders, matching np.gradient. Rows are processed in parallel.
+        Both dimensions must be at least 2.
+
+        Args:
+            u: Horizontal flow component (H, W), contiguous
+            v: Vertical flow component (H, W), contiguous
+            div: Output divergence (H, W)
+            curl: Output curl (H, W)
+            strain: Output strain energy (H, W)
+        """
+        height, width = u.shape
+
+        for y in prange(height):
+            y0 = max(y - 1, 0)
+            y1 = min(y + 1, height - 1)
+            inv_dy = 1.0 / (y1 - y0)
+
+            _store_metrics(u, v, div, curl, strain, y, 0, 0, 1, y0, y1, 1.0, inv_dy)
+            for x in range(1, width - 1):
+                _store_metrics(u, v, div, curl, strain, y, x, x - 1, x + 1,
+                               y0, y1, 0.5, inv_dy)
+            _store_metrics(u, v, div, curl, strain, y, width - 1, width - 2, width - 1,
+                           y0, y1, 1.0, inv_dy)
+
+    @njit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+    def fuse_accumulate(u, v, weight, div, curl, energy):
+        """
+        Compute the flow metrics and add them, weighted, to the accumulators.
+
+        Same stencil as fuse_metrics, but the per-frame metric maps are never
+        materialized: derivatives, strain and the temporal-weighted update
+        happen in a single sweep. Both dimensions must be at least 2.
+
+        Args:
+            u: Horizontal flow component (H, W), contiguous
+            v: Vertical flow component (H, W), contiguous
+            weight: Temporal weight for this frame pair
+            div: Divergence accumulator (H, W), updated in place
+            curl: Curl accumulator (H, W), updated in place
+            energy: Strain energy accumulator (H, W), updated in place
+        """
+        height, width = u.shape
+
+        for y in prange(height):
+            y0 = max(y - 1, 0)
+            y1 = min(y + 1, height - 1)
+            inv_dy = 1.0 / (y1 - y0)
+
+            _accumulate_metrics(u, v, weight, div, curl, energy,
+                                y, 0, 0, 1, y0, y1, 1.0, inv_dy)
+            for x in range(1, width - 1):
+                _accumulate_metrics(u, v, weight, div, curl, energy,
+                                    y, x, x - 1, x + 1, y0, y1, 0.5, inv_dy)
+            _accumulate_metrics(u, v, weight, div, curl, energy,
+                                y, width - 1, width - 2, width - 1, y0, y1, 1.0, inv_dy)
+
+else:
+    fuse_metrics = None
+    fuse_accumulate = None
+
+
+def set_num_threads(count):
+    """Limit the threads used by the parallel kernels (no-op without Numba)."""
+    if HAVE_NUMBA:
+        numba.set_num_threads(max(1, min(count, numba.config.NUMBA_NUM_THREADS)))
+
+
+_warmed_up = False
+
+
+def warmup():
+    """Compile the kernels for float32 input so the first frame is not penalized."""
+    global _warmed_up
+    if not HAVE_NUMBA or _warmed_up:
+        return
+
+    u = np.zeros((4, 4), dtype=np.float32)
+    fuse_metrics(u, u.copy(), np.empty_like(u), np.empty_like(u), np.empty_like(u))
+    fuse_accumulate(u, u.copy(), 1.0, np.zeros_like(u), np.zeros_like(u), np.zeros_like(u))
+    _warmed_up = True
+
+
+# Threads per block side for the CUDA kernel; each block stages a
+# (TILE + 2) x (TILE + 2) halo tile of the flow in shared memory
+_CUDA_TILE = 16
+
+_CUDA_FUSE_ACCUMULATE_SRC = r"""
+#define TILE %(tile)d
+
+extern "C" __global__
+void fuse_accumulate(const char* flow, long long flow_step,
+                     char* div, char* curl, char* energy, long long acc_step,
+                     int width, int height, float weight)
+{
+    __shared__ float2 tile[TILE + 2][TILE + 2];
+
+    const int x0 = blockIdx.x * TILE - 1;
+    const int y0 = blockIdx.y * TILE - 1;
+
+    // Cooperative load with coordinates clamped to the image, so a border
+    // pixel's missing neighbour is the pixel itself
+    for (int i = threadIdx.y * TILE + threadIdx.x; i < (TILE + 2) * (TILE + 2);
+         i += TILE * TILE) {
+        const int ty = i / (TILE + 2);
+        const int tx = i %% (TILE + 2);
+        const int gx = min(max(x0 + tx, 0), width - 1);
+        const int gy = min(max(y0 + ty, 0), height - 1);
+        tile[ty][tx] = *(const float2*)(flow + gy * flow_step + gx * sizeof(float2));
+    }
+    __syncthreads();
+
+    const int x = blockIdx.x * TILE + threadIdx.x;
+    const int y = blockIdx.y * TILE + threadIdx.y;
+    if (x >= width || y >= height) {
+        return;
+    }
+
+    // Central differences inside, one-sided at the borders (np.gradient)
+    const int tx = threadIdx.x + 1;
+    const int ty = threadIdx.y + 1;
+    const float inv_dx = (x == 0 || x == width - 1) ? 1.0f : 0.5f;
+    const float inv_dy = (y == 0 || y == height - 1) ? 1.0f : 0.5f;
+
+    const float2 left = tile[ty][tx - 1];
+    const float2 right = tile[ty][tx + 1];
+    const float2 up = tile[ty - 1][tx];
+    const float2 down = tile[ty + 1][tx];
+
+    const float du_dx = (right.x - left.x) * inv_dx;
+    const float dv_dx = (right.y - left.y) * inv_dx;
+    const float du_dy = (down.x - up.x) * inv_dy;
+    const float dv_dy = (down.y - up.y) * inv_dy;
+    const float shear = du_dy + dv_dx;
+
+    const long long offset = y * acc_step + x * sizeof(float);
+    *(float*)(div + offset) += weight * (du_dx + dv_dy);
+    *(float*)(curl + offset) += weight * (dv_dx - du_dy);
+    *(float*)(energy + offset) +=
+        weight * sqrtf(du_dx * du_dx + dv_dy * dv_dy + 0.5f * shear * shear);
+}
+""" % {'tile': _CUDA_TILE}
+
+
+@lru_cache(maxsize=None)
+def _cuda_fuse_accumulate_kernel():
+    """Compile the CUDA accumulate kernel once per process."""
+    return cupy.RawKernel(_CUDA_FUSE_ACCUMULATE_SRC, 'fuse_accumulate')
+
+
+def _as_cupy(mat):
+    """Wrap a cv2.cuda_GpuMat's pitched memory as a CuPy byte array without copying."""
+    _, rows = mat.size()
+    memory = cupy.cuda.UnownedMemory(mat.cudaPtr(), mat.step * rows, mat)
+    return cupy.ndarray((mat.step * rows,), dtype=cupy.uint8,
+                        memptr=cupy.cuda.MemoryPointer(memory, 0))
+
+
+def cuda_fuse_accumulate(flow, weight, div, curl, energy):
+    """
+    Device counterpart of fuse_accumulate for cv2.cuda_GpuMat operands.
+
+    One kernel launch reads the interleaved flow once and updates the three
+    accumulators in place; u and v are never split into separate planes.
+    The accumulators must share one size and row pitch, as GpuMats of the
+    same shape and type allocated by OpenCV do.
+
+    Args:
+        flow: Device flow field (CV_32FC2)
+        weight: Temporal weight for this frame pair
+        div: Divergence accumulator (CV_32FC1), updated in place
+        curl: Curl accumulator (CV_32FC1), updated in place
+        energy: Strain energy accumulator (CV_32FC1), updated in place
+    """
+    width, height = flow.size()
+    grid = ((width + _CUDA_TILE - 1) // _CUDA_TILE, (height + _CUDA_TILE - 1) // _CUDA_TILE)
+
+    _cuda_fuse_accumulate_kernel()(
+        grid, (_CUDA_TILE, _CUDA_TILE),
+        (_as_cupy(flow), np.int64(flow.step),
+         _as_cupy(div), _as_cupy(curl), _as_cupy(energy), np.int64(div.step),
+         np.int32(width), np.int32(height), np.float32(weight))
+    )
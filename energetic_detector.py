@@ -14,19 +14,298 @@ Uses fluid dynamics principles to map kinetic energy propagation via:
 import argparse
 import json
 import os
+import queue
 import sys
+import threading
+import traceback
+from functools import lru_cache
 from pathlib import Path
 
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.ndimage import gaussian_filter
+
+try:
+    import av
+except ImportError:
+    av = None
+
+import _kernels
+
+
+# Supported video decoders
+DECODERS = ('opencv', 'pyav')
+
+# Supported optical flow methods (DIS preset for the DIS variants)
+FLOW_METHODS = {
+    'farneback': None,
+    'dis': cv2.DISOPTICAL_FLOW_PRESET_MEDIUM,
+    'disfast': cv2.DISOPTICAL_FLOW_PRESET_FAST,
+}
+
+
+def _cuda_available():
+    """Return True if OpenCV was built with CUDA and a device is present."""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+def _open_capture(video_path):
+    """
+    Open a video with the FFmpeg backend, falling back to any other backend.
+    
+    FFmpeg is preferred over GStreamer and the other autodetected backends
+    for file decoding. The single-frame buffer hint only applies to backends
+    that queue frames (e.g. live cameras); for others it is ignored.
+    
+    Args:
+        video_path: Path to the video file
+        
+    Returns:
+        cap: cv2.VideoCapture (check isOpened())
+    """
+    cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG)
+    if not cap.isOpened():
+        cap = cv2.VideoCapture(str(video_path))
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+# Items buffered between background pipeline stages
+_PREFETCH_DEPTH = 4
+
+
+def _prefetch(iterable, maxsize=_PREFETCH_DEPTH):
+    """
+    Run an iterable in a background thread, yielding its items in order.
+    
+    Items are handed over through a bounded queue so the producer runs at
+    most maxsize items ahead. OpenCV and NumPy release the GIL in their heavy
+    calls, which lets consecutive pipeline stages overlap. Exceptions raised
+    by the producer are re-raised in the consumer.
+    
+    Args:
+        iterable: Items to produce
+        maxsize: Maximum number of items buffered between the threads
+        
+    Yields:
+        Items from iterable
+    """
+    items = queue.Queue(maxsize=maxsize)
+    cancelled = threading.Event()
+    errors = []
+    
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+        
+        # Sentinel signalling the end of the stream
+        put(None)
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    
+    try:
+        while True:
+            item = items.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        cancelled.set()
+        producer.join()
+    
+    if errors:
+        raise errors[0]
+
+
+# Gaussian smoothing applied to the combined metric before thresholding
+_SMOOTHING_SIGMA = 5
+
+
+@lru_cache(maxsize=None)
+def _gaussian_kernel(sigma):
+    """1D Gaussian kernel with scipy's default radius (truncate=4.0), built once per sigma."""
+    ksize = 2 * int(4.0 * sigma + 0.5) + 1
+    return cv2.getGaussianKernel(ksize, sigma)
+
+
+def _gaussian_smooth(image, sigma):
+    """
+    Separable Gaussian blur with OpenCV's vectorized filter.
+    
+    Kernel radius and border handling match scipy.ndimage.gaussian_filter
+    defaults (truncate=4.0, mode='reflect'). The kernel is cached so repeated
+    detections (e.g. in batch runs) do not rebuild it.
+    
+    Args:
+        image: 2D float array
+        sigma: Gaussian standard deviation in pixels
+        
+    Returns:
+        smoothed: Blurred image
+    """
+    kernel = _gaussian_kernel(sigma)
+    return cv2.sepFilter2D(image, -1, kernel, kernel, borderType=cv2.BORDER_REFLECT)
+
+
+def _stack_blur_ksize(sigma):
+    """Odd stackBlur kernel size whose triangular weights have standard deviation ~sigma."""
+    # A stack blur of radius r has variance r * (r + 2) / 6
+    radius = int(round(np.sqrt(1.0 + 6.0 * sigma * sigma) - 1.0))
+    return 2 * max(radius, 1) + 1
+
+
+def _fast_gaussian_smooth(image, sigma):
+    """
+    Approximate Gaussian blur with cv2.stackBlur.
+    
+    Stack blur costs a constant few adds per pixel regardless of sigma,
+    against 2 * (8 * sigma + 1) multiply-adds for the exact separable
+    kernel (about 1.8x faster at sigma=5 on 1080p). Its triangular weights
+    are within a few percent of the Gaussian's width, which is ample for
+    percentile thresholding and region centroids. Inputs other than
+    float32 fall back to the exact _gaussian_smooth.
+    
+    Args:
+        image: 2D float array
+        sigma: Gaussian standard deviation in pixels
+        
+    Returns:
+        smoothed: Blurred image
+    """
+    # stackBlur has no float64 implementation
+    if image.dtype != np.float32:
+        return _gaussian_smooth(image, sigma)
+    
+    ksize = _stack_blur_ksize(sigma)
+    return cv2.stackBlur(image, (ksize, ksize))
+
+
+def _abs_max(values):
+    """Largest absolute value of a 2D map, without materializing np.abs."""
+    low, high, _, _ = cv2.minMaxLoc(values)
+    return max(-low, high)
+
+
+def _epicenter_dicts(epicenters):
+    """Convert an (N, 3) array of (x, y, score) rows to JSON-ready dicts."""
+    return [
+        {'x': int(x), 'y': int(y), 'score': float(score)}
+        for x, y, score in epicenters.tolist()
+    ]
+
+
+# Number of epicenters reported by analyze_video
+_MAX_EPICENTERS = 5
+
+# Number of largest hotspot regions whose centroid is intensity-weighted
+_REFINE_REGIONS = 16
+
+
+def _histogram_percentile(values, percentile, bins=1024):
+    """
+    Approximate a percentile with a single histogram pass instead of a sort.
+    
+    Returns the upper edge of the bin containing the percentile, so the
+    result is at most one bin width above the exact value and a constant
+    map never yields a threshold below its own value.
+    
+    Args:
+        values: Array of values
+        percentile: Percentile in [0, 100]
+        bins: Number of histogram bins
+        
+    Returns:
+        threshold: Approximate percentile value
+    """
+    hist, edges = np.histogram(values, bins=bins)
+    cumulative = np.cumsum(hist)
+    idx = np.searchsorted(cumulative, percentile / 100.0 * cumulative[-1])
+    return edges[min(idx, bins - 1) + 1]
+
+
+class _BufferPool:
+    """
+    Fixed set of reusable arrays handed between pipeline stages.
+    
+    A stage acquires a buffer, fills it and passes it downstream; the stage
+    that last reads it releases it back. acquire() blocks while all buffers
+    are in flight, which bounds memory and keeps buffers from being
+    overwritten while still in use.
+    """
+    
+    def __init__(self, count, shape, dtype):
+        self._free = queue.Queue()
+        for _ in range(count):
+            self._free.put(np.empty(shape, dtype=dtype))
+    
+    def acquire(self):
+        """Take a free buffer, waiting for one to be released if necessary."""
+        return self._free.get()
+    
+    def release(self, buffer):
+        """Return a buffer to the pool."""
+        self._free.put(buffer)
+
+
+def _gradient(src, axis, out):
+    """
+    Central-difference derivative of a 2D array along one axis.
+    
+    Equivalent to np.gradient(src, axis=axis) (first-order one-sided
+    differences at the borders) but writes into a preallocated output.
+    d/dx uses OpenCV's vectorized [-0.5, 0, 0.5] Sobel row filter, which is
+    about 2.5x faster than strided NumPy slices; d/dy subtracts whole
+    contiguous rows, where NumPy is already fastest.
+    
+    Args:
+        src: 2D float32 input array
+        axis: 0 for d/dy, 1 for d/dx
+        out: Contiguous output array with the same shape as src
+        
+    Returns:
+        out
+    """
+    if axis == 0:
+        np.subtract(src[2:], src[:-2], out=out[1:-1])
+        out[1:-1] *= 0.5
+        np.subtract(src[1], src[0], out=out[0])
+        np.subtract(src[-1], src[-2], out=out[-1])
+        return out
+    
+    cv2.Sobel(src, cv2.CV_32F, 1, 0, dst=out, ksize=1, scale=0.5,
+              borderType=cv2.BORDER_REPLICATE)
+    np.subtract(src[:, 1], src[:, 0], out=out[:, 0])
+    np.subtract(src[:, -1], src[:, -2], out=out[:, -1])
+    return out
 
 
 class EnergeticEpicenterDetector:
     """Main detector class for analyzing energetic events in video."""
     
-    def __init__(self, video_path, output_dir="epicenter_analysis", skip_frames=1):
+    def __init__(self, video_path, output_dir="epicenter_analysis", skip_frames=1,
+                 use_cuda=False, workers=1, use_jit=True, flow_method='farneback',
+                 flow_scale=1.0, decoder='opencv', num_threads=None, use_opencl=False):
         """
         Initialize the detector.
         
@@ -34,32 +313,164 @@ class EnergeticEpicenterDetector:
             video_path: Path to the video file
             output_dir: Directory for output files
             skip_frames: Process every Nth frame for performance
+            use_cuda: Run optical flow on the GPU (falls back to CPU if no
+                CUDA device is available)
+            workers: Threads for the frame pipeline. 2 decodes frames in the
+                background, 3 also computes optical flow in its own thread
+            use_jit: Use the Numba metrics kernel when numba is installed
+            flow_method: Optical flow algorithm: 'farneback' (default), 'dis'
+                or 'disfast' (DIS presets trading accuracy for speed). CUDA
+                is only used with Farneback
+            flow_scale: Resolution factor (0, 1] at which optical flow is
+                computed; maps are upsampled to full resolution at the end
+            decoder: Video decoder, 'opencv' (default) or 'pyav' (requires
+                PyAV; threaded FFmpeg decoding and direct YUV-to-gray output)
+            num_threads: Threads OpenCV (and the Numba kernels) may use. None
+                uses every CPU; pass 1 when running several detectors in
+                parallel processes. This is a process-wide setting
+            use_opencl: Run optical flow through OpenCV's OpenCL T-API
+                (cv2.UMat), e.g. on integrated GPUs without CUDA. Falls back
+                to CPU if OpenCL is unavailable; ignored when CUDA is used
         """
+        if decoder not in DECODERS:
+            raise ValueError(f"Unknown decoder: {decoder} (choose from {', '.join(DECODERS)})")
+        if decoder == 'pyav' and av is None:
+            raise ValueError("The 'pyav' decoder requires PyAV (pip install av)")
+        if not 0 < flow_scale <= 1:
+            raise ValueError(f"flow_scale must be in (0, 1], got {flow_scale}")
+        if flow_method not in FLOW_METHODS:
+            raise ValueError(
+                f"Unknown flow method: {flow_method} (choose from {', '.join(FLOW_METHODS)})"
+            )
+        
         self.video_path = video_path
         self.output_dir = Path(output_dir)
         self.skip_frames = skip_frames
+        self.flow_method = flow_method
+        self.decoder = decoder
+        self.flow_scale = flow_scale
+        self._flow_size = None
+        self.use_cuda = use_cuda and flow_method == 'farneback' and _cuda_available()
+        self.use_opencl = use_opencl and not self.use_cuda and cv2.ocl.haveOpenCL()
+        self.use_jit = use_jit and _kernels.HAVE_NUMBA
+        self.workers = workers
+        self.num_threads = num_threads
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # OpenCV's default depends on the build; Farneback and DIS parallelize
+        # over rows, so request the CPUs explicitly
+        threads = num_threads if num_threads is not None else cv2.getNumberOfCPUs()
+        cv2.setNumThreads(threads)
+        _kernels.set_num_threads(threads)
+        
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        
+        # Pay the JIT compile cost up front rather than on the first frame
+        if self.use_jit:
+            _kernels.warmup()
+        
+        # DIS optical flow instance (reused across frame pairs)
+        self._dis = None
+        if flow_method != 'farneback':
+            self._dis = cv2.DISOpticalFlow_create(FLOW_METHODS[flow_method])
+            self._dis.setUseSpatialPropagation(True)
+        
+        # CUDA optical flow state (created lazily on first use)
+        self._cuda_farneback = None
+        self._gpu_bgr = None
+        self._gpu_prev = None
+        self._gpu_curr = None
+        self._gpu_flow = None
+        
+        # Reused per-frame metric buffers (allocated on first use)
+        self._uv = None
+        self._jacobian = None
+        self._div = None
+        self._curl = None
+        self._strain = None
+        
         # Analysis results
+        self._clear_results()
+    
+    def reset(self, video_path, skip_frames=None):
+        """
+        Point the detector at another video, keeping its configuration.
+        
+        Flow instances (DIS, CUDA), compiled kernels and per-frame metric
+        buffers are kept; the buffers are only reallocated if the next
+        video's flow resolution differs. Previous results are cleared.
+        
+        Args:
+            video_path: Path to the next video file
+            skip_frames: New frame skip (None keeps the current one)
+        """
+        self.video_path = video_path
+        if skip_frames is not None:
+            self.skip_frames = skip_frames
+        self._flow_size = None
+        self._clear_results()
+    
+    def _clear_results(self):
+        """Reset the analysis result attributes."""
         self.energy_map = None
         self.divergence_map = None
         self.curl_map = None
         self.epicenter_candidates = []
-        
-    def compute_optical_flow(self, prev_gray, curr_gray):
+        self.epicenters_array = np.empty((0, 3))
+    
+    def compute_optical_flow(self, prev_gray, curr_gray, flow=None):
         """
-        Compute dense optical flow using Farneback method.
+        Compute dense optical flow using the configured method.
+        
+        Frames must be 8-bit: every backend consumes CV_8UC1 directly, so
+        they are never promoted to float (which would quadruple the bytes
+        the pyramid construction reads).
         
         Args:
-            prev_gray: Previous frame (grayscale)
-            curr_gray: Current frame (grayscale)
+            prev_gray: Previous frame (grayscale uint8)
+            curr_gray: Current frame (grayscale uint8)
+            flow: Optional preallocated (H, W, 2) float32 output buffer
             
         Returns:
             flow: Optical flow field (u, v components)
         """
-        flow = cv2.calcOpticalFlowFarneback(
+        for frame in (prev_gray, curr_gray):
+            if frame.dtype != np.uint8 or frame.ndim != 2:
+                raise ValueError(
+                    f"Optical flow expects 2D uint8 grayscale frames, "
+                    f"got {frame.dtype} with shape {frame.shape}"
+                )
+        
+        if self.use_cuda:
+            # Standalone calls use their own device buffers so they never
+            # disturb the frame state of a running analysis
+            self._init_cuda()
+            self._gpu_scratch_prev.upload(prev_gray)
+            self._gpu_scratch_curr.upload(curr_gray)
+            self._cuda_farneback.calc(
+                self._gpu_scratch_prev, self._gpu_scratch_curr, self._gpu_scratch_flow
+            )
+            return self._gpu_scratch_flow.download(flow)
+        
+        if self.use_opencl:
+            # UMat inputs make OpenCV dispatch to its OpenCL kernels
+            result = self._calc_flow(cv2.UMat(prev_gray), cv2.UMat(curr_gray), None).get()
+            if flow is None:
+                return result
+            np.copyto(flow, result)
+            return flow
+        
+        return self._calc_flow(prev_gray, curr_gray, flow)
+    
+    def _calc_flow(self, prev_gray, curr_gray, flow):
+        """Run the configured CPU/OpenCL flow method on arrays or UMats."""
+        if self._dis is not None:
+            return self._dis.calc(prev_gray, curr_gray, flow)
+        
+        return cv2.calcOpticalFlowFarneback(
             prev_gray, curr_gray,
-            None,
+            flow,
             pyr_scale=0.5,
             levels=3,
             winsize=15,
@@ -68,7 +479,138 @@ class EnergeticEpicenterDetector:
             poly_sigma=1.2,
             flags=0
         )
-        return flow
+    
+    def _init_cuda(self):
+        """Create the CUDA Farneback instance and persistent device buffers."""
+        if self._cuda_farneback is not None:
+            return
+        
+        self._cuda_farneback = cv2.cuda.FarnebackOpticalFlow_create(
+            numLevels=3,
+            pyrScale=0.5,
+            fastPyramids=False,
+            winSize=15,
+            numIters=3,
+            polyN=5,
+            polySigma=1.2,
+            flags=0
+        )
+        self._gpu_bgr = cv2.cuda_GpuMat()
+        self._gpu_gray = cv2.cuda_GpuMat()
+        self._gpu_prev = cv2.cuda_GpuMat()
+        self._gpu_curr = cv2.cuda_GpuMat()
+        self._gpu_flow = cv2.cuda_GpuMat()
+        self._gpu_scratch_prev = cv2.cuda_GpuMat()
+        self._gpu_scratch_curr = cv2.cuda_GpuMat()
+        self._gpu_scratch_flow = cv2.cuda_GpuMat()
+    
+    def _cuda_push_frame(self, frame):
+        """
+        Upload a BGR frame, convert it to grayscale and resize it to the flow
+        resolution on the device.
+        
+        The previous/current device buffers are swapped rather than copied,
+        so the last pushed frame becomes the previous frame for the next pair.
+        
+        Args:
+            frame: BGR frame from the video
+        """
+        self._gpu_prev, self._gpu_curr = self._gpu_curr, self._gpu_prev
+        self._gpu_bgr.upload(frame)
+        
+        if self._flow_size is None or frame.shape[1::-1] == self._flow_size:
+            cv2.cuda.cvtColor(self._gpu_bgr, cv2.COLOR_BGR2GRAY, dst=self._gpu_curr)
+        else:
+            cv2.cuda.cvtColor(self._gpu_bgr, cv2.COLOR_BGR2GRAY, dst=self._gpu_gray)
+            cv2.cuda.resize(self._gpu_gray, self._flow_size, dst=self._gpu_curr,
+                            interpolation=cv2.INTER_AREA)
+    
+    def _cuda_flow(self):
+        """Compute flow between the device frame buffers, leaving it on the device."""
+        self._cuda_farneback.calc(self._gpu_prev, self._gpu_curr, self._gpu_flow)
+        return self._gpu_flow
+    
+    def _init_cuda_accumulators(self, height, width):
+        """
+        Allocate zeroed device accumulators and per-frame metric buffers.
+        
+        Args:
+            height: Flow field height
+            width: Flow field width
+        """
+        def device_mat():
+            return cv2.cuda_GpuMat(height, width, cv2.CV_32FC1)
+        
+        self._gpu_energy = device_mat()
+        self._gpu_divergence = device_mat()
+        self._gpu_curl = device_mat()
+        for accumulator in (self._gpu_energy, self._gpu_divergence, self._gpu_curl):
+            accumulator.setTo(0)
+        
+        # The CuPy kernel needs no intermediate planes or filters
+        if _kernels.HAVE_CUPY:
+            return
+        
+        self._gpu_uv = [device_mat(), device_mat()]
+        self._gpu_jacobian = [device_mat() for _ in range(4)]
+        self._gpu_metric = device_mat()
+        self._gpu_scratch = device_mat()
+        
+        # Central differences [-0.5, 0, 0.5] along x and y
+        diff = np.array([[-0.5, 0.0, 0.5]], dtype=np.float32)
+        self._gpu_ddx = cv2.cuda.createLinearFilter(
+            cv2.CV_32FC1, cv2.CV_32FC1, diff, borderMode=cv2.BORDER_REPLICATE
+        )
+        self._gpu_ddy = cv2.cuda.createLinearFilter(
+            cv2.CV_32FC1, cv2.CV_32FC1, diff.T.copy(), borderMode=cv2.BORDER_REPLICATE
+        )
+    
+    def _cuda_accumulate(self, gpu_flow, weight):
+        """
+        Compute the flow metrics on the device and add them to the accumulators.
+        
+        With CuPy installed this is a single fused kernel launch that matches
+        the CPU path exactly. Otherwise it falls back to OpenCV's CUDA
+        filters and arithmetic, which use the same central differences; at
+        the image borders the replicated edge halves the one-sided difference.
+        
+        Args:
+            gpu_flow: Device flow field (CV_32FC2)
+            weight: Temporal weight for this frame pair
+        """
+        if _kernels.HAVE_CUPY:
+            _kernels.cuda_fuse_accumulate(gpu_flow, weight, self._gpu_divergence,
+                                          self._gpu_curl, self._gpu_energy)
+            return
+        
+        du_dx, du_dy, dv_dx, dv_dy = self._gpu_jacobian
+        metric = self._gpu_metric
+        scratch = self._gpu_scratch
+        
+        u, v = cv2.cuda.split(gpu_flow, self._gpu_uv)
+        self._gpu_ddx.apply(u, du_dx)
+        self._gpu_ddy.apply(u, du_dy)
+        self._gpu_ddx.apply(v, dv_dx)
+        self._gpu_ddy.apply(v, dv_dy)
+        
+        # Divergence = du/dx + dv/dy
+        cv2.cuda.add(du_dx, dv_dy, metric)
+        cv2.cuda.addWeighted(self._gpu_divergence, 1.0, metric, weight, 0.0,
+                             self._gpu_divergence)
+        
+        # Curl (z-component) = dv/dx - du/dy
+        cv2.cuda.subtract(dv_dx, du_dy, metric)
+        cv2.cuda.addWeighted(self._gpu_curl, 1.0, metric, weight, 0.0, self._gpu_curl)
+        
+        # Strain energy = sqrt(du/dx^2 + dv/dy^2 + 0.5 * (du/dy + dv/dx)^2)
+        cv2.cuda.add(du_dy, dv_dx, scratch)
+        cv2.cuda.multiply(scratch, scratch, scratch, 0.5)
+        cv2.cuda.multiply(du_dx, du_dx, metric)
+        cv2.cuda.add(metric, scratch, metric)
+        cv2.cuda.multiply(dv_dy, dv_dy, scratch)
+        cv2.cuda.add(metric, scratch, metric)
+        cv2.cuda.sqrt(metric, metric)
+        cv2.cuda.addWeighted(self._gpu_energy, 1.0, metric, weight, 0.0, self._gpu_energy)
     
     def compute_divergence(self, flow):
         """
@@ -80,17 +622,7 @@ class EnergeticEpicenterDetector:
         Returns:
             divergence: Scalar field representing expansion
         """
-        # Get u and v components
-        u = flow[:, :, 0]
-        v = flow[:, :, 1]
-        
-        # Compute partial derivatives
-        du_dx = np.gradient(u, axis=1)
-        dv_dy = np.gradient(v, axis=0)
-        
-        # Divergence = du/dx + dv/dy
-        divergence = du_dx + dv_dy
-        return divergence
+        return self._compute_flow_metrics(flow)[0].copy()
     
     def compute_curl(self, flow):
         """
@@ -102,17 +634,7 @@ class EnergeticEpicenterDetector:
         Returns:
             curl: Scalar field representing rotation
         """
-        # Get u and v components
-        u = flow[:, :, 0]
-        v = flow[:, :, 1]
-        
-        # Compute partial derivatives
-        du_dy = np.gradient(u, axis=0)
-        dv_dx = np.gradient(v, axis=1)
-        
-        # Curl (z-component) = dv/dx - du/dy
-        curl = dv_dx - du_dy
-        return curl
+        return self._compute_flow_metrics(flow)[1].copy()
     
     def compute_strain_energy(self, flow):
         """
@@ -124,27 +646,124 @@ class EnergeticEpicenterDetector:
         Returns:
             strain_energy: Energy metric
         """
-        u = flow[:, :, 0]
-        v = flow[:, :, 1]
+        return self._compute_flow_metrics(flow)[2].copy()
+    
+    def _compute_flow_metrics(self, flow):
+        """
+        Compute divergence, curl and strain energy in a single fused pass.
         
-        # Compute strain rate tensor components
-        du_dx = np.gradient(u, axis=1)
-        du_dy = np.gradient(u, axis=0)
-        dv_dx = np.gradient(v, axis=1)
-        dv_dy = np.gradient(v, axis=0)
+        The four velocity gradients are computed once with central differences
+        (one-sided at the borders, matching np.gradient) and every result is
+        written in place into buffers that are reused across frames. The
+        interleaved flow is first split into contiguous u and v planes so the
+        derivative passes read unit-stride memory. Uses the Numba kernel when
+        available.
         
-        # Normal strain rates
-        e_xx = du_dx
-        e_yy = dv_dy
+        Args:
+            flow: Optical flow field
+            
+        Returns:
+            (divergence, curl, strain_energy): Views of the reused buffers,
+            valid until the next call
+        """
+        self._validate_flow(flow)
+        self._ensure_metric_buffers(flow.shape[:2], flow.dtype)
+        u, v = cv2.split(flow, self._uv)
+        
+        if self.use_jit:
+            _kernels.fuse_metrics(u, v, self._div, self._curl, self._strain)
+            return self._div, self._curl, self._strain
         
-        # Shear strain rate
-        e_xy = 0.5 * (du_dy + dv_dx)
+        du_dx, du_dy, dv_dx, dv_dy = self._flow_jacobian(u, v)
+        
+        # Divergence = du/dx + dv/dy, curl (z-component) = dv/dx - du/dy
+        np.add(du_dx, dv_dy, out=self._div)
+        np.subtract(dv_dx, du_dy, out=self._curl)
+        
+        # Strain energy (simplified von Mises):
+        # sqrt(e_xx^2 + e_yy^2 + 2 * e_xy^2) with e_xy = 0.5 * (du/dy + dv/dx).
+        # The gradient buffers are no longer needed and double as scratch.
+        shear = np.add(du_dy, dv_dx, out=du_dy)
+        np.multiply(shear, shear, out=shear)
+        shear *= 0.5
+        np.multiply(du_dx, du_dx, out=self._strain)
+        self._strain += shear
+        np.multiply(dv_dy, dv_dy, out=dv_dy)
+        self._strain += dv_dy
+        np.sqrt(self._strain, out=self._strain)
+        
+        return self._div, self._curl, self._strain
+    
+    def _flow_jacobian(self, u, v):
+        """
+        Compute the four velocity gradients into the reused Jacobian buffers.
+        
+        Args:
+            u: Horizontal flow component (H, W), contiguous
+            v: Vertical flow component (H, W), contiguous
+            
+        Returns:
+            (du_dx, du_dy, dv_dx, dv_dy): Views of the reused buffers, valid
+            until the next call
+        """
+        du_dx, du_dy, dv_dx, dv_dy = self._jacobian
+        _gradient(u, 1, out=du_dx)
+        _gradient(u, 0, out=du_dy)
+        _gradient(v, 1, out=dv_dx)
+        _gradient(v, 0, out=dv_dy)
+        return self._jacobian
+    
+    def _accumulate_flow_metrics(self, flow, weight, energy_map, divergence_map, curl_map):
+        """
+        Add the temporally weighted flow metrics to the accumulation maps.
+        
+        With the Numba kernel, metrics and accumulation are fused into a
+        single sweep and no per-frame metric maps are written.
+        
+        Args:
+            flow: Optical flow field
+            weight: Temporal weight for this frame pair
+            energy_map: Strain energy accumulator, updated in place
+            divergence_map: Divergence accumulator, updated in place
+            curl_map: Curl accumulator, updated in place
+        """
+        if self.use_jit:
+            self._validate_flow(flow)
+            self._ensure_metric_buffers(flow.shape[:2], flow.dtype)
+            u, v = cv2.split(flow, self._uv)
+            _kernels.fuse_accumulate(u, v, weight, divergence_map, curl_map, energy_map)
+            return
+        
+        # In-place axpy (dst = weight * src + dst) without a weighted temporary
+        divergence, curl, strain_energy = self._compute_flow_metrics(flow)
+        cv2.scaleAdd(strain_energy, weight, energy_map, energy_map)
+        cv2.scaleAdd(divergence, weight, divergence_map, divergence_map)
+        cv2.scaleAdd(curl, weight, curl_map, curl_map)
+    
+    @staticmethod
+    def _validate_flow(flow):
+        """Raise ValueError unless flow is an (H, W, 2) field with H, W >= 2."""
+        if flow.ndim != 3 or flow.shape[2] != 2 or flow.shape[0] < 2 or flow.shape[1] < 2:
+            raise ValueError(
+                f"Flow field must be at least 2x2 with (u, v) channels, got {flow.shape}"
+            )
+    
+    def _ensure_metric_buffers(self, shape, dtype):
+        """(Re)allocate the per-frame metric buffers if shape or dtype changed."""
+        if (self._div is None or self._div.shape != shape
+                or self._div.dtype != dtype):
+            self._jacobian = None
+            self._uv = [np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype)]
+            self._div = np.empty(shape, dtype=dtype)
+            self._curl = np.empty(shape, dtype=dtype)
+            self._strain = np.empty(shape, dtype=dtype)
         
-        # Strain energy (simplified von Mises)
-        strain_energy = np.sqrt(e_xx**2 + e_yy**2 + 2 * e_xy**2)
-        return strain_energy
+        # The gradient scratch buffers are only needed by the NumPy path
+        if self._jacobian is None and not self.use_jit:
+            self._jacobian = tuple(np.empty(shape, dtype=dtype) for _ in range(4))
     
-    def detect_epicenters(self, energy_map, divergence_map, threshold_percentile=95):
+    def detect_epicenters(self, energy_map, divergence_map, threshold_percentile=95,
+                          top_k=None):
         """
         Detect potential epicenter locations.
         
@@ -152,140 +771,222 @@ class EnergeticEpicenterDetector:
             energy_map: Accumulated energy field
             divergence_map: Accumulated divergence field
             threshold_percentile: Percentile for thresholding
+            top_k: Maximum number of epicenters to return (None for all)
             
         Returns:
-            epicenters: List of (x, y, score) tuples
+            epicenters: List of {'x', 'y', 'score'} dicts, highest score first
+        """
+        return _epicenter_dicts(self._rank_epicenters(
+            energy_map, divergence_map, threshold_percentile, top_k
+        ))
+    
+    def _rank_epicenters(self, energy_map, divergence_map, threshold_percentile=95,
+                         top_k=None):
+        """
+        Detect potential epicenter locations as an array.
+        
+        Args:
+            energy_map: Accumulated energy field
+            divergence_map: Accumulated divergence field
+            threshold_percentile: Percentile for thresholding
+            top_k: Maximum number of epicenters to return (None for all)
+            
+        Returns:
+            epicenters: (N, 3) float64 array of (x, y, score) rows, highest
+            score first; x and y are integral pixel coordinates
         """
         # Combine energy and divergence
         combined_metric = energy_map * np.abs(divergence_map)
         
         # Apply Gaussian smoothing
-        smoothed = gaussian_filter(combined_metric, sigma=5)
+        smoothed = _fast_gaussian_smooth(combined_metric, _SMOOTHING_SIGMA)
         
         # Threshold
-        threshold = np.percentile(smoothed, threshold_percentile)
-        hotspots = smoothed > threshold
+        threshold = _histogram_percentile(smoothed, threshold_percentile)
+        hotspots = (smoothed > threshold).astype(np.uint8)
         
-        # Find local maxima
-        from scipy.ndimage import label
-        labeled, num_features = label(hotspots)
+        # Label hotspot regions (4-connectivity, as scipy.ndimage.label)
+        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(
+            hotspots, connectivity=4
+        )
         
-        epicenters = []
-        for i in range(1, num_features + 1):
-            region = labeled == i
-            y_coords, x_coords = np.where(region)
-            
-            if len(y_coords) > 0:
-                # Compute center of mass weighted by intensity
-                weights = smoothed[region]
-                center_x = int(np.average(x_coords, weights=weights))
-                center_y = int(np.average(y_coords, weights=weights))
-                score = float(smoothed[center_y, center_x])
-                
-                epicenters.append({
-                    'x': center_x,
-                    'y': center_y,
-                    'score': score
-                })
-        
-        # Sort by score
-        epicenters.sort(key=lambda e: e['score'], reverse=True)
+        # Plain centroids from the component stats for every region, then
+        # intensity-weighted centroids only for the largest regions
+        centers = centroids[1:].astype(np.intp)
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        for i in np.argsort(-areas)[:_REFINE_REGIONS]:
+            x0, y0, w, h = (int(n) for n in stats[i + 1, :4])
+            window = smoothed[y0:y0 + h, x0:x0 + w]
+            region = labels[y0:y0 + h, x0:x0 + w] == i + 1
+            y_coords, x_coords = np.nonzero(region)
+            weights = window[region]
+            centers[i, 0] = int(np.average(x_coords, weights=weights)) + x0
+            centers[i, 1] = int(np.average(y_coords, weights=weights)) + y0
+        
+        scores = smoothed[centers[:, 1], centers[:, 0]]
+        
+        # Rank by score (stable, so ties keep label order); a single best
+        # epicenter needs no sort
+        if top_k == 1 and len(scores):
+            order = np.argmax(scores)[None]
+        else:
+            order = np.argsort(-scores, kind='stable')[:top_k]
+        epicenters = np.empty((len(order), 3))
+        epicenters[:, :2] = centers[order]
+        epicenters[:, 2] = scores[order]
         return epicenters
     
-    def analyze_video(self, json_output=False):
+    def analyze_video(self, json_output=False, top_k=_MAX_EPICENTERS):
         """
         Analyze the video and detect energetic epicenters.
         
         Args:
             json_output: If True, return JSON instead of showing visualizations
+            top_k: Maximum number of epicenters to report
             
         Returns:
             results: Dictionary with analysis results
         """
-        cap = cv2.VideoCapture(self.video_path)
-        
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {self.video_path}")
-        
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        # Initialize accumulation maps
-        energy_map = np.zeros((height, width), dtype=np.float32)
-        divergence_map = np.zeros((height, width), dtype=np.float32)
-        curl_map = np.zeros((height, width), dtype=np.float32)
-        
-        # Temporal decay factor (prioritize early events)
-        temporal_weights = []
+        if self.decoder == 'pyav':
+            try:
+                container = av.open(self.video_path)
+            except av.FFmpegError as e:
+                raise ValueError(f"Cannot open video: {self.video_path}") from e
+            
+            if not container.streams.video:
+                container.close()
+                raise ValueError(f"No video stream in: {self.video_path}")
+            
+            # Let FFmpeg decode with frame-level threading
+            stream = container.streams.video[0]
+            stream.thread_type = 'AUTO'
+            
+            # Get video properties
+            fps = float(stream.average_rate or 0)
+            frame_count = stream.frames
+            width = stream.codec_context.width
+            height = stream.codec_context.height
+            release = container.close
+        else:
+            cap = _open_capture(self.video_path)
+            
+            if not cap.isOpened():
+                raise ValueError(f"Cannot open video: {self.video_path}")
+            
+            # Get video properties
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            release = cap.release
         
-        # Read first frame
-        ret, prev_frame = cap.read()
-        if not ret:
-            raise ValueError("Cannot read video frames")
+        # Optical flow resolution (width, height)
+        self._flow_size = (
+            max(2, int(round(width * self.flow_scale))),
+            max(2, int(round(height * self.flow_scale)))
+        )
+        flow_width, flow_height = self._flow_size
         
-        prev_gray = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
+        # Initialize accumulation maps at the flow resolution. They stay
+        # float32: the metrics are produced in float32, and a float16
+        # accumulator costs a conversion per update that outweighs the saved
+        # bandwidth (NumPy and Numba have no native half-precision arithmetic)
+        energy_map = np.zeros((flow_height, flow_width), dtype=np.float32)
+        divergence_map = np.zeros((flow_height, flow_width), dtype=np.float32)
+        curl_map = np.zeros((flow_height, flow_width), dtype=np.float32)
         
-        frame_idx = 0
         processed_frames = 0
         
         if not json_output:
             print(f"Analyzing video: {self.video_path}")
             print(f"Resolution: {width}x{height}, FPS: {fps:.2f}, Frames: {frame_count}")
         
-        while True:
-            ret, curr_frame = cap.read()
-            if not ret:
-                break
-            
-            frame_idx += 1
-            
-            # Skip frames for performance
-            if frame_idx % (self.skip_frames + 1) != 0:
-                continue
-            
-            curr_gray = cv2.cvtColor(curr_frame, cv2.COLOR_BGR2GRAY)
-            
-            # Compute optical flow
-            flow = self.compute_optical_flow(prev_gray, curr_gray)
-            
-            # Compute fluid dynamics metrics
-            divergence = self.compute_divergence(flow)
-            curl = self.compute_curl(flow)
-            strain_energy = self.compute_strain_energy(flow)
-            
-            # Temporal weighting (early frames get higher weight)
-            time_weight = np.exp(-processed_frames / 10.0)
-            temporal_weights.append(time_weight)
-            
-            # Accumulate weighted metrics
-            energy_map += strain_energy * time_weight
-            divergence_map += divergence * time_weight
-            curl_map += curl * time_weight
-            
-            prev_gray = curr_gray
-            processed_frames += 1
-            
-            if not json_output and processed_frames % 10 == 0:
-                print(f"Processed {processed_frames} frames...")
+        # Reused frame and flow buffers. Serially two gray frames (prev and
+        # curr) and one flow are live at a time; background stages may run
+        # up to a queue's worth ahead
+        queued = _PREFETCH_DEPTH + 2
+        self._gray_pool = _BufferPool(
+            queued if self.workers > 1 else 2, (flow_height, flow_width), np.uint8
+        )
+        self._flow_pool = _BufferPool(
+            queued if self.workers > 2 else 1, (flow_height, flow_width, 2), np.float32
+        )
+        self._full_gray = None
         
-        cap.release()
+        # Decoding, optical flow and accumulation form a pipeline; with more
+        # than one worker the first stages run in background threads
+        if self.decoder == 'pyav':
+            frames = self._iter_frames_pyav(container, stream)
+        else:
+            frames = self._iter_frames(cap)
+        if self.workers > 1:
+            frames = _prefetch(frames)
+        flows = self._iter_flows(frames)
+        if self.workers > 2 and not self.use_cuda:
+            # The CUDA flow stays in a single device buffer, so it is consumed
+            # in lockstep rather than queued
+            flows = _prefetch(flows)
+        
+        if self.use_cuda:
+            self._init_cuda_accumulators(flow_height, flow_width)
+        
+        try:
+            for flow in flows:
+                # Temporal weighting (early frames get higher weight)
+                time_weight = np.exp(-processed_frames / 10.0)
+                
+                if self.use_cuda:
+                    # Metrics and accumulation stay on the device
+                    self._cuda_accumulate(flow, time_weight)
+                else:
+                    self._accumulate_flow_metrics(
+                        flow, time_weight, energy_map, divergence_map, curl_map
+                    )
+                    self._flow_pool.release(flow)
+                
+                processed_frames += 1
+                
+                if not json_output and processed_frames % 10 == 0:
+                    print(f"Processed {processed_frames} frames...")
+        finally:
+            # Close the outermost stage first: with workers == 3 this joins
+            # the flow thread, so nothing else is iterating frames when it
+            # is closed here (closing an already-finished generator is a no-op)
+            flows.close()
+            frames.close()
+            release()
         
         if processed_frames == 0:
             raise ValueError("No frames processed")
         
+        if self.use_cuda:
+            # Single device-to-host transfer of the accumulated maps
+            energy_map = self._gpu_energy.download()
+            divergence_map = self._gpu_divergence.download()
+            curl_map = self._gpu_curl.download()
+        
         # Normalize maps
         self.energy_map = energy_map / processed_frames
         self.divergence_map = divergence_map / processed_frames
         self.curl_map = curl_map / processed_frames
         
+        # Bring downsampled maps back to the video resolution so epicenter
+        # coordinates are reported in original pixels
+        if self._flow_size != (width, height):
+            self.energy_map = cv2.resize(self.energy_map, (width, height),
+                                         interpolation=cv2.INTER_LINEAR)
+            self.divergence_map = cv2.resize(self.divergence_map, (width, height),
+                                             interpolation=cv2.INTER_LINEAR)
+            self.curl_map = cv2.resize(self.curl_map, (width, height),
+                                       interpolation=cv2.INTER_LINEAR)
+        
         # Detect epicenters
-        self.epicenter_candidates = self.detect_epicenters(
-            self.energy_map, 
-            self.divergence_map
+        self.epicenters_array = self._rank_epicenters(
+            self.energy_map,
+            self.divergence_map,
+            top_k=top_k
         )
+        self.epicenter_candidates = _epicenter_dicts(self.epicenters_array)
         
         results = {
             'video_path': self.video_path,
@@ -296,7 +997,7 @@ class EnergeticEpicenterDetector:
                 'frame_count': frame_count,
                 'processed_frames': processed_frames
             },
-            'epicenters': self.epicenter_candidates[:5]  # Top 5
+            'epicenters': self.epicenter_candidates
         }
         
         if not json_output:
@@ -310,6 +1011,126 @@ class EnergeticEpicenterDetector:
         
         return results
     
+    def _iter_frames(self, cap):
+        """
+        Read the frames to be processed, honouring skip_frames.
+        
+        Skipped frames are only grabbed (demuxed and decoded), never
+        retrieved, so they skip the YUV-to-BGR conversion and copy. Kept
+        frames are converted to grayscale and resized to the flow resolution
+        here, except on the CUDA path where both happen on the device.
+        
+        Args:
+            cap: Opened cv2.VideoCapture
+            
+        Yields:
+            Grayscale frames (BGR frames when using CUDA)
+        """
+        if not cap.grab():
+            raise ValueError("Cannot read video frames")
+        
+        # On the CPU path each BGR frame is converted before the next one is
+        # retrieved, so one decode buffer is reused; CUDA frames are queued
+        # as-is and each needs its own
+        bgr = None
+        
+        frame_idx = 0
+        while True:
+            if frame_idx % (self.skip_frames + 1) == 0:
+                ret, frame = cap.retrieve(bgr)
+                if not ret:
+                    break
+                if self.use_cuda:
+                    yield frame
+                else:
+                    bgr = frame
+                    yield self._prepare_gray(frame)
+            
+            if not cap.grab():
+                break
+            frame_idx += 1
+    
+    def _iter_frames_pyav(self, container, stream):
+        """
+        Decode the frames to be processed with PyAV, honouring skip_frames.
+        
+        Skipped frames are decoded but never converted. Kept frames go
+        straight from the decoder's YUV to grayscale at the flow resolution
+        in a single swscale call, without an intermediate BGR image.
+        
+        Args:
+            container: Opened av container
+            stream: Video stream to decode
+            
+        Yields:
+            Grayscale frames (BGR frames when using CUDA)
+        """
+        flow_width, flow_height = self._flow_size
+        decoded = False
+        
+        for frame_idx, frame in enumerate(container.decode(stream)):
+            decoded = True
+            if frame_idx % (self.skip_frames + 1) != 0:
+                continue
+            
+            if self.use_cuda:
+                yield frame.to_ndarray(format='bgr24')
+                continue
+            
+            gray = self._gray_pool.acquire()
+            np.copyto(gray, frame.reformat(
+                width=flow_width, height=flow_height, format='gray'
+            ).to_ndarray())
+            yield gray
+        
+        if not decoded:
+            raise ValueError("Cannot read video frames")
+    
+    def _prepare_gray(self, frame):
+        """
+        Convert a BGR frame to grayscale at the optical flow resolution.
+        
+        The result is written into a buffer from the gray frame pool; when
+        resizing, the full-resolution conversion goes through a single
+        scratch buffer owned by the reading stage.
+        """
+        gray = self._gray_pool.acquire()
+        if frame.shape[1::-1] == self._flow_size:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        
+        self._full_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._full_gray)
+        return cv2.resize(self._full_gray, self._flow_size, dst=gray,
+                          interpolation=cv2.INTER_AREA)
+    
+    def _iter_flows(self, frames):
+        """
+        Compute optical flow between consecutive processed frames.
+        
+        Args:
+            frames: Iterable of frames from _iter_frames
+            
+        Yields:
+            Optical flow field for each consecutive pair (a device GpuMat,
+            valid until the next pair, when using CUDA)
+        """
+        if self.use_cuda:
+            self._init_cuda()
+            for i, frame in enumerate(frames):
+                self._cuda_push_frame(frame)
+                if i > 0:
+                    yield self._cuda_flow()
+            return
+        
+        prev_gray = None
+        for curr_gray in frames:
+            if prev_gray is not None:
+                flow = self.compute_optical_flow(
+                    prev_gray, curr_gray, self._flow_pool.acquire()
+                )
+                self._gray_pool.release(prev_gray)
+                yield flow
+            prev_gray = curr_gray
+    
     def visualize_results(self):
         """Create and save visualization of the analysis results."""
         if self.energy_map is None:
@@ -323,18 +1144,20 @@ class EnergeticEpicenterDetector:
         axes[0, 0].axis('off')
         plt.colorbar(im1, ax=axes[0, 0])
         
+        # Symmetric color limits from a single min/max pass per map
+        div_limit = _abs_max(self.divergence_map)
+        curl_limit = _abs_max(self.curl_map)
+        
         # Divergence map
-        im2 = axes[0, 1].imshow(self.divergence_map, cmap='seismic', 
-                                vmin=-np.abs(self.divergence_map).max(),
-                                vmax=np.abs(self.divergence_map).max())
+        im2 = axes[0, 1].imshow(self.divergence_map, cmap='seismic',
+                                vmin=-div_limit, vmax=div_limit)
         axes[0, 1].set_title('Divergence Map (Expansion/Compression)')
         axes[0, 1].axis('off')
         plt.colorbar(im2, ax=axes[0, 1])
         
         # Curl map
         im3 = axes[1, 0].imshow(self.curl_map, cmap='twilight',
-                                vmin=-np.abs(self.curl_map).max(),
-                                vmax=np.abs(self.curl_map).max())
+                                vmin=-curl_limit, vmax=curl_limit)
         axes[1, 0].set_title('Curl Map (Rotation)')
         axes[1, 0].axis('off')
         plt.colorbar(im3, ax=axes[1, 0])
@@ -345,9 +1168,9 @@ class EnergeticEpicenterDetector:
         axes[1, 1].set_title('Combined Energy + Divergence (with Epicenters)')
         
         # Mark epicenters
-        for ep in self.epicenter_candidates[:5]:
-            axes[1, 1].plot(ep['x'], ep['y'], 'c*', markersize=20, markeredgecolor='blue')
-            axes[1, 1].text(ep['x'], ep['y'] - 20, f"#{self.epicenter_candidates.index(ep) + 1}",
+        for rank, (x, y, _) in enumerate(self.epicenters_array[:5], 1):
+            axes[1, 1].plot(x, y, 'c*', markersize=20, markeredgecolor='blue')
+            axes[1, 1].text(x, y - 20, f"#{rank}",
                           color='cyan', fontsize=12, fontweight='bold', ha='center')
         
         axes[1, 1].axis('off')
@@ -375,6 +1198,24 @@ def main():
                        help='Process every Nth frame (default: 1, no skipping)')
     parser.add_argument('--json', action='store_true',
                        help='Output results as JSON (no visualizations)')
+    parser.add_argument('--cuda', action='store_true',
+                       help='Compute optical flow on a CUDA GPU if available')
+    parser.add_argument('--opencl', action='store_true',
+                       help='Compute optical flow with OpenCL (cv2.UMat) if available')
+    parser.add_argument('--flow', choices=list(FLOW_METHODS), default='farneback',
+                       help='Optical flow algorithm (default: farneback)')
+    parser.add_argument('--flow-scale', type=float, default=1.0,
+                       help='Compute optical flow at this fraction of the video '
+                            'resolution, e.g. 0.5 (default: 1.0)')
+    parser.add_argument('--decoder', choices=DECODERS, default='opencv',
+                       help='Video decoder; pyav requires PyAV (default: opencv)')
+    parser.add_argument('--no-jit', action='store_true',
+                       help='Disable the Numba-compiled metrics kernel')
+    parser.add_argument('--threads', type=int, default=None,
+                       help='OpenCV/Numba threads (default: all CPUs)')
+    parser.add_argument('--workers', type=int, default=1, choices=[1, 2, 3],
+                       help='Pipeline threads: 2 overlaps decoding, 3 also overlaps '
+                            'optical flow (default: 1)')
     
     args = parser.parse_args()
     
@@ -388,7 +1229,15 @@ def main():
         detector = EnergeticEpicenterDetector(
             args.video_path,
             output_dir=args.output_dir,
-            skip_frames=args.skip
+            skip_frames=args.skip,
+            use_cuda=args.cuda,
+            workers=args.workers,
+            use_jit=not args.no_jit,
+            flow_method=args.flow,
+            flow_scale=args.flow_scale,
+            decoder=args.decoder,
+            num_threads=args.threads,
+            use_opencl=args.opencl
         )
         
         # Analyze video
@@ -404,7 +1253,6 @@ def main():
     except Exception as e:
         print(f"Error during analysis: {e}", file=sys.stderr)
         if not args.json:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
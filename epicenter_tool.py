@@ -6,13 +6,46 @@ A wrapper class for integrating the Energetic Epicenter Detector
 into AI agents and forensic workflows.
 """
 
+import argparse
 import json
-import subprocess
+import multiprocessing
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Optional
 
 
+def _analyze_worker(
+    tool: 'EpicenterTool',
+    video_path: str,
+    skip_frames: int,
+    num_threads: Optional[int] = None
+) -> Dict:
+    """
+    Analyze a single video for batch_analyze, reporting failures as a result.
+    
+    Runs at module level so it can be executed in worker processes.
+    
+    Args:
+        tool: Tool whose analyze_video performs the analysis
+        video_path: Path to the video file
+        skip_frames: Process every Nth frame
+        num_threads: OpenCV thread count for this process (None uses all CPUs)
+        
+    Returns:
+        Result dictionary, or a dictionary with video_path and error on failure
+    """
+    try:
+        return tool.analyze_video(video_path, skip_frames, num_threads=num_threads)
+    except Exception as e:
+        return {
+            'video_path': video_path,
+            'error': str(e)
+        }
+
+
 class EpicenterTool:
     """
     Bridge class for AI integration with the Energetic Epicenter Detector.
@@ -30,12 +63,16 @@ class EpicenterTool:
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._isolated_executor = None
+        self._detector = None
         
     def analyze_video(
         self, 
         video_path: str, 
         skip_frames: int = 1,
-        use_subprocess: bool = False
+        use_subprocess: bool = False,
+        num_threads: Optional[int] = None,
+        top_k: int = 5
     ) -> Dict:
         """
         Analyze a video for energetic epicenters.
@@ -43,7 +80,9 @@ class EpicenterTool:
         Args:
             video_path: Path to the video file
             skip_frames: Process every Nth frame for performance
-            use_subprocess: Use subprocess instead of direct import (for isolation)
+            use_subprocess: Analyze in a separate, reused worker process (for isolation)
+            num_threads: OpenCV thread count (default: all CPUs)
+            top_k: Maximum number of epicenters to report
             
         Returns:
             Dictionary with analysis results including:
@@ -52,42 +91,85 @@ class EpicenterTool:
             - epicenters: List of detected epicenters with x, y, score
         """
         if use_subprocess:
-            return self._analyze_subprocess(video_path, skip_frames)
+            return self._analyze_subprocess(video_path, skip_frames, num_threads, top_k)
         else:
-            return self._analyze_direct(video_path, skip_frames)
+            return self._analyze_direct(video_path, skip_frames, num_threads, top_k)
     
-    def _analyze_direct(self, video_path: str, skip_frames: int) -> Dict:
-        """Analyze using direct module import."""
+    def _analyze_direct(
+        self,
+        video_path: str,
+        skip_frames: int,
+        num_threads: Optional[int] = None,
+        top_k: int = 5
+    ) -> Dict:
+        """
+        Analyze using direct module import.
+        
+        One detector is kept and reset for each video, so its flow
+        instances, compiled kernels and buffers are reused; it is only
+        recreated when the thread count changes.
+        """
         from energetic_detector import EnergeticEpicenterDetector
         
-        detector = EnergeticEpicenterDetector(
-            video_path,
-            output_dir=str(self.output_dir),
-            skip_frames=skip_frames
-        )
+        detector = self._detector
+        if detector is None or detector.num_threads != num_threads:
+            detector = EnergeticEpicenterDetector(
+                video_path,
+                output_dir=str(self.output_dir),
+                skip_frames=skip_frames,
+                num_threads=num_threads
+            )
+            self._detector = detector
+        else:
+            detector.reset(video_path, skip_frames)
         
-        results = detector.analyze_video(json_output=True)
+        results = detector.analyze_video(json_output=True, top_k=top_k)
         return results
     
-    def _analyze_subprocess(self, video_path: str, skip_frames: int) -> Dict:
-        """Analyze using subprocess for isolation."""
-        cmd = [
-            sys.executable,
-            'energetic_detector.py',
-            video_path,
-            '--output-dir', str(self.output_dir),
-            '--skip', str(skip_frames),
-            '--json'
-        ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        return json.loads(result.stdout)
+    def _analyze_subprocess(
+        self,
+        video_path: str,
+        skip_frames: int,
+        num_threads: Optional[int] = None,
+        top_k: int = 5
+    ) -> Dict:
+        """
+        Analyze in a separate process for isolation.
+        
+        The worker process is spawned on first use and reused by later calls,
+        so Python start-up and module imports are paid once, and results come
+        back pickled rather than printed and parsed as JSON. Exceptions raised
+        by the analysis are re-raised here.
+        """
+        if self._isolated_executor is None:
+            self._isolated_executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        
+        return self._isolated_executor.submit(
+            self._analyze_direct, video_path, skip_frames, num_threads, top_k
+        ).result()
+    
+    def close(self):
+        """Shut down the isolated worker process, if one was started."""
+        if self._isolated_executor is not None:
+            self._isolated_executor.shutdown()
+            self._isolated_executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def __getstate__(self):
+        # Worker processes receive the tool without the parent's executor
+        # and detector (which holds unpicklable OpenCV objects)
+        state = self.__dict__.copy()
+        state['_isolated_executor'] = None
+        state['_detector'] = None
+        return state
     
     def get_top_epicenter(
         self, 
@@ -97,6 +179,9 @@ class EpicenterTool:
         """
         Get the single most likely epicenter location.
         
+        Only the best epicenter is ranked; like analyze_video, this runs
+        without visualizations or console output.
+        
         Args:
             video_path: Path to the video file
             skip_frames: Process every Nth frame
@@ -104,7 +189,7 @@ class EpicenterTool:
         Returns:
             Dictionary with top epicenter or None if no epicenters found
         """
-        results = self.analyze_video(video_path, skip_frames)
+        results = self.analyze_video(video_path, skip_frames, top_k=1)
         
         if results.get('epicenters'):
             return results['epicenters'][0]
@@ -113,30 +198,48 @@ class EpicenterTool:
     def batch_analyze(
         self, 
         video_paths: List[str], 
-        skip_frames: int = 2
+        skip_frames: int = 2,
+        max_workers: Optional[int] = None
     ) -> List[Dict]:
         """
         Analyze multiple videos in batch.
         
+        Videos are analyzed in parallel worker processes, each limited to its
+        share of OpenCV and Numba threads (1 when there is a worker per CPU)
+        so the pool does not oversubscribe the CPU.
+        
         Args:
             video_paths: List of video file paths
             skip_frames: Process every Nth frame
+            max_workers: Number of worker processes (default: one per CPU,
+                capped at the number of videos; 1 analyzes serially)
             
         Returns:
-            List of result dictionaries, one per video
+            List of result dictionaries, one per video, in input order
         """
-        results = []
-        for video_path in video_paths:
-            try:
-                result = self.analyze_video(video_path, skip_frames)
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    'video_path': video_path,
-                    'error': str(e)
-                })
+        cpu_count = os.cpu_count() or 1
+        if max_workers is None:
+            max_workers = cpu_count
+        max_workers = min(max_workers, len(video_paths))
         
-        return results
+        if max_workers <= 1:
+            return [
+                _analyze_worker(self, video_path, skip_frames)
+                for video_path in video_paths
+            ]
+        
+        # Spawn rather than fork: forked children inherit the parent's OpenCV
+        # and Numba thread pools in an unusable state and deadlock
+        num_threads = max(1, cpu_count // max_workers)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            return list(executor.map(
+                _analyze_worker,
+                repeat(self),
+                video_paths,
+                repeat(skip_frames),
+                repeat(num_threads)
+            ))
     
     def format_for_llm(self, results: Dict) -> str:
         """
@@ -172,8 +275,6 @@ class EpicenterTool:
 
 def main():
     """Example usage of the EpicenterTool."""
-    import argparse
-    
     parser = argparse.ArgumentParser(
         description='Epicenter Tool - AI Integration Bridge'
     )
@@ -137,10 +137,11 @@ def example_synthetic_demo():
     
     # Explosion center
     cx, cy = width // 2, height // 2
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
     
     for frame_idx in range(num_frames):
-        # Create blank frame
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        # Clear the frame
+        frame.fill(0)
         
         # Expanding circle (shockwave)
         t = frame_idx / fps
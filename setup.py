@@ -20,7 +20,7 @@ setup(
     license="MIT",
     
     # Package configuration
-    py_modules=["energetic_detector", "epicenter_tool"],
+    py_modules=["energetic_detector", "epicenter_tool", "_kernels"],
     python_requires=">=3.8",
     
     # Dependencies
@@ -30,6 +30,11 @@ setup(
         "scipy>=1.11.0",
         "matplotlib>=3.7.0",
     ],
+    extras_require={
+        "jit": ["numba>=0.57.0"],
+        "cuda": ["cupy-cuda12x>=12.0.0"],
+        "pyav": ["av>=10.0.0"],
+    },
     
     # Entry points for command-line tools
     entry_points={
@@ -0,0 +1,53 @@
+"""Shared test fixtures."""
+
+import atexit
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def _fixture_dir():
+    """Temporary directory for shared fixtures, removed at interpreter exit."""
+    path = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return Path(path)
+
+
+@lru_cache(maxsize=None)
+def get_test_video(num_frames=20):
+    """
+    Create a synthetic video with an expanding circle, once per process.
+    
+    The video is MJPG in an AVI container: every frame is a key frame, so
+    both writing it and decoding it in each test are cheap compared to an
+    inter-coded format, and all test classes share the same file.
+    
+    Args:
+        num_frames: Number of frames in the video
+    
+    Returns:
+        Path to the cached video file
+    """
+    width, height = 320, 240
+    fps = 10
+    
+    video_path = _fixture_dir() / f"test_video_{num_frames}.avi"
+    fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+    out = cv2.VideoWriter(str(video_path), fourcc, fps, (width, height))
+    
+    cx, cy = width // 2, height // 2
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    
+    for i in range(num_frames):
+        frame.fill(0)
+        radius = 10 + i * 5
+        cv2.circle(frame, (cx, cy), radius, (255, 255, 255), 2)
+        out.write(frame)
+    
+    out.release()
+    return video_path
@@ -1,5 +1,6 @@
 """Tests for the Energetic Epicenter Detector."""
 
+import json
 import unittest
 import numpy as np
 import cv2
@@ -10,6 +11,10 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from tests._fixtures import get_test_video
+
+import _kernels
+import energetic_detector
 from energetic_detector import EnergeticEpicenterDetector
 
 
@@ -18,27 +23,9 @@ class TestEnergeticDetector(unittest.TestCase):
     
     @classmethod
     def setUpClass(cls):
-        """Create a synthetic test video."""
+        """Set up the shared synthetic test video and an output directory."""
         cls.temp_dir = tempfile.mkdtemp()
-        cls.test_video_path = Path(cls.temp_dir) / "test_video.mp4"
-        
-        # Create a simple test video with an expanding circle
-        width, height = 320, 240
-        fps = 10
-        num_frames = 20
-        
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(cls.test_video_path), fourcc, fps, (width, height))
-        
-        cx, cy = width // 2, height // 2
-        
-        for i in range(num_frames):
-            frame = np.zeros((height, width, 3), dtype=np.uint8)
-            radius = 10 + i * 5
-            cv2.circle(frame, (cx, cy), radius, (255, 255, 255), 2)
-            out.write(frame)
-        
-        out.release()
+        cls.test_video_path = get_test_video()
     
     def test_detector_initialization(self):
         """Test detector can be initialized."""
@@ -68,6 +55,148 @@ class TestEnergeticDetector(unittest.TestCase):
         # Check that there is some flow detected
         self.assertGreater(np.abs(flow).max(), 0)
     
+    def test_dis_optical_flow(self):
+        """Test DIS optical flow returns the same layout as Farneback."""
+        frame1 = np.zeros((100, 100), dtype=np.uint8)
+        frame2 = np.zeros((100, 100), dtype=np.uint8)
+        cv2.circle(frame1, (40, 50), 10, 255, -1)
+        cv2.circle(frame2, (50, 50), 10, 255, -1)
+        
+        for method in ('dis', 'disfast'):
+            detector = EnergeticEpicenterDetector(
+                str(self.test_video_path),
+                output_dir=self.temp_dir,
+                flow_method=method
+            )
+            flow = detector.compute_optical_flow(frame1, frame2)
+            
+            self.assertEqual(flow.shape, (100, 100, 2))
+            self.assertEqual(flow.dtype, np.float32)
+            self.assertGreater(np.abs(flow).max(), 0)
+        
+        with self.assertRaises(ValueError):
+            EnergeticEpicenterDetector(
+                str(self.test_video_path),
+                output_dir=self.temp_dir,
+                flow_method='unknown'
+            )
+    
+    def test_cuda_fallback(self):
+        """Test CUDA flag falls back to CPU flow when no device is present."""
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            use_cuda=True
+        )
+        
+        if cv2.cuda.getCudaEnabledDeviceCount() == 0:
+            self.assertFalse(detector.use_cuda)
+        
+        frame1 = np.zeros((100, 100), dtype=np.uint8)
+        frame2 = np.zeros((100, 100), dtype=np.uint8)
+        cv2.circle(frame1, (40, 50), 10, 255, -1)
+        cv2.circle(frame2, (50, 50), 10, 255, -1)
+        
+        flow = detector.compute_optical_flow(frame1, frame2)
+        self.assertEqual(flow.shape, (100, 100, 2))
+    
+    def test_opencl_flow(self):
+        """Test the OpenCL flag matches CPU flow, or falls back without OpenCL."""
+        frame1 = np.zeros((100, 100), dtype=np.uint8)
+        frame2 = np.zeros((100, 100), dtype=np.uint8)
+        cv2.circle(frame1, (40, 50), 10, 255, -1)
+        cv2.circle(frame2, (50, 50), 10, 255, -1)
+        
+        cpu_flow = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir
+        ).compute_optical_flow(frame1, frame2)
+        
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            use_opencl=True
+        )
+        self.assertEqual(detector.use_opencl, cv2.ocl.haveOpenCL())
+        
+        out = np.empty_like(cpu_flow)
+        flow = detector.compute_optical_flow(frame1, frame2, out)
+        self.assertIs(flow, out)
+        np.testing.assert_allclose(flow, cpu_flow, atol=0.05)
+    
+    def test_optical_flow_rejects_non_uint8(self):
+        """Test optical flow requires 8-bit grayscale frames."""
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir
+        )
+        frame = np.zeros((100, 100), dtype=np.uint8)
+        
+        with self.assertRaises(ValueError):
+            detector.compute_optical_flow(frame.astype(np.float32), frame)
+        with self.assertRaises(ValueError):
+            detector.compute_optical_flow(frame, np.zeros((100, 100, 3), dtype=np.uint8))
+    
+    @unittest.skipUnless(cv2.cuda.getCudaEnabledDeviceCount() > 0, "no CUDA device")
+    def test_cuda_flow_matches_cpu_layout(self):
+        """Test GPU flow has the same shape and dtype as the CPU flow."""
+        frame1 = np.zeros((100, 100), dtype=np.uint8)
+        frame2 = np.zeros((100, 100), dtype=np.uint8)
+        cv2.circle(frame1, (40, 50), 10, 255, -1)
+        cv2.circle(frame2, (50, 50), 10, 255, -1)
+        
+        cpu_flow = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir
+        ).compute_optical_flow(frame1, frame2)
+        
+        gpu_detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            use_cuda=True
+        )
+        self.assertTrue(gpu_detector.use_cuda)
+        gpu_flow = gpu_detector.compute_optical_flow(frame1, frame2)
+        
+        self.assertEqual(gpu_flow.shape, cpu_flow.shape)
+        self.assertEqual(gpu_flow.dtype, cpu_flow.dtype)
+        
+        # The streaming path pushes frames through the swapped device buffers
+        gpu_detector._cuda_push_frame(cv2.cvtColor(frame1, cv2.COLOR_GRAY2BGR))
+        gpu_detector._cuda_push_frame(cv2.cvtColor(frame2, cv2.COLOR_GRAY2BGR))
+        self.assertEqual(gpu_detector._cuda_flow().download().shape, cpu_flow.shape)
+        
+        # On-device metrics accumulate to the same maps as the CPU kernels
+        gpu_detector._init_cuda_accumulators(100, 100)
+        gpu_detector._cuda_accumulate(cv2.cuda_GpuMat(cpu_flow), 1.0)
+        divergence, curl, _ = gpu_detector._compute_flow_metrics(cpu_flow)
+        np.testing.assert_allclose(
+            gpu_detector._gpu_divergence.download()[1:-1, 1:-1],
+            divergence[1:-1, 1:-1], rtol=1e-4, atol=1e-4
+        )
+    
+    @unittest.skipUnless(cv2.cuda.getCudaEnabledDeviceCount() > 0 and _kernels.HAVE_CUPY,
+                         "no CUDA device or CuPy not installed")
+    def test_cupy_accumulate_matches_cpu(self):
+        """Test the fused CuPy kernel matches the CPU metrics, borders included."""
+        rng = np.random.default_rng(0)
+        flow = rng.standard_normal((37, 53, 2)).astype(np.float32)
+        
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            use_cuda=True
+        )
+        detector._init_cuda_accumulators(37, 53)
+        detector._cuda_accumulate(cv2.cuda_GpuMat(flow), 0.5)
+        
+        divergence, curl, strain = detector._compute_flow_metrics(flow)
+        for gpu_map, expected in ((detector._gpu_divergence, divergence),
+                                  (detector._gpu_curl, curl),
+                                  (detector._gpu_energy, strain)):
+            np.testing.assert_allclose(gpu_map.download(), 0.5 * expected,
+                                       rtol=1e-4, atol=1e-5)
+    
     def test_divergence_computation(self):
         """Test divergence computation."""
         detector = EnergeticEpicenterDetector(
@@ -125,6 +254,146 @@ class TestEnergeticDetector(unittest.TestCase):
         self.assertEqual(strain_energy.shape, (100, 100))
         self.assertTrue(np.all(strain_energy >= 0))  # Energy should be non-negative
     
+    def test_fused_metrics_match_reference(self):
+        """Test fused metrics kernel matches the np.gradient formulation."""
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir
+        )
+        
+        flow = np.random.randn(60, 80, 2).astype(np.float32)
+        u = flow[:, :, 0]
+        v = flow[:, :, 1]
+        du_dx = np.gradient(u, axis=1)
+        du_dy = np.gradient(u, axis=0)
+        dv_dx = np.gradient(v, axis=1)
+        dv_dy = np.gradient(v, axis=0)
+        e_xy = 0.5 * (du_dy + dv_dx)
+        
+        divergence, curl, strain_energy = detector._compute_flow_metrics(flow)
+        
+        np.testing.assert_allclose(divergence, du_dx + dv_dy, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(curl, dv_dx - du_dy, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(
+            strain_energy,
+            np.sqrt(du_dx**2 + dv_dy**2 + 2 * e_xy**2),
+            rtol=1e-5, atol=1e-5
+        )
+    
+    @unittest.skipUnless(_kernels.HAVE_NUMBA, "numba not installed")
+    def test_jit_metrics_match_numpy(self):
+        """Test the Numba metrics kernel matches the NumPy implementation."""
+        flow = np.random.randn(60, 80, 2).astype(np.float32)
+        
+        numpy_detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            use_jit=False
+        )
+        self.assertFalse(numpy_detector.use_jit)
+        expected = numpy_detector._compute_flow_metrics(flow)
+        
+        jit_detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir
+        )
+        self.assertTrue(jit_detector.use_jit)
+        actual = jit_detector._compute_flow_metrics(flow)
+        
+        for a, e in zip(actual, expected):
+            np.testing.assert_allclose(a, e, rtol=1e-5, atol=1e-5)
+    
+    def test_accumulate_matches_across_paths(self):
+        """Test fused JIT accumulation matches the NumPy metrics + add path."""
+        flow = np.random.randn(60, 80, 2).astype(np.float32)
+        maps = {}
+        
+        for use_jit in (False, True):
+            detector = EnergeticEpicenterDetector(
+                str(self.test_video_path),
+                output_dir=self.temp_dir,
+                use_jit=use_jit
+            )
+            accumulators = [np.zeros((60, 80), dtype=np.float32) for _ in range(3)]
+            detector._accumulate_flow_metrics(flow, 1.0, *accumulators)
+            detector._accumulate_flow_metrics(flow, 0.5, *accumulators)
+            maps[use_jit] = accumulators
+        
+        for a, e in zip(maps[True], maps[False]):
+            np.testing.assert_allclose(a, e, rtol=1e-5, atol=1e-5)
+    
+    def test_metrics_reject_degenerate_flow(self):
+        """Test flow fields narrower than 2 pixels are rejected on both paths."""
+        for use_jit in (False, True):
+            detector = EnergeticEpicenterDetector(
+                str(self.test_video_path),
+                output_dir=self.temp_dir,
+                use_jit=use_jit
+            )
+            for shape in ((1, 5, 2), (5, 1, 2)):
+                with self.assertRaises(ValueError):
+                    detector._compute_flow_metrics(np.zeros(shape, dtype=np.float32))
+    
+    def test_gaussian_smoothing_matches_scipy(self):
+        """Test OpenCV smoothing matches scipy.ndimage.gaussian_filter."""
+        from scipy.ndimage import gaussian_filter
+        from energetic_detector import _gaussian_smooth
+        
+        image = np.random.rand(80, 120).astype(np.float32)
+        
+        np.testing.assert_allclose(
+            _gaussian_smooth(image, 5),
+            gaussian_filter(image, sigma=5),
+            rtol=1e-3, atol=1e-4
+        )
+    
+    def test_gradient_matches_numpy(self):
+        """Test the in-place derivative matches np.gradient, borders included."""
+        from energetic_detector import _gradient
+        
+        for shape in ((31, 47), (2, 5), (5, 2)):
+            src = np.random.rand(*shape).astype(np.float32)
+            for axis in (0, 1):
+                out = np.empty_like(src)
+                np.testing.assert_allclose(
+                    _gradient(src, axis, out), np.gradient(src, axis=axis),
+                    rtol=1e-5, atol=1e-6
+                )
+    
+    def test_num_threads(self):
+        """Test num_threads configures OpenCV's thread pool."""
+        try:
+            EnergeticEpicenterDetector(
+                str(self.test_video_path),
+                output_dir=self.temp_dir,
+                num_threads=1
+            )
+            self.assertEqual(cv2.getNumThreads(), 1)
+        finally:
+            EnergeticEpicenterDetector(str(self.test_video_path), output_dir=self.temp_dir)
+    
+    def test_abs_max(self):
+        """Test symmetric color limits match np.abs(...).max()."""
+        from energetic_detector import _abs_max
+        
+        values = np.random.randn(40, 60).astype(np.float32)
+        values[3, 7] = -9.0
+        self.assertAlmostEqual(_abs_max(values), 9.0)
+        self.assertAlmostEqual(_abs_max(values), float(np.abs(values).max()))
+    
+    def test_fast_smoothing_approximates_gaussian(self):
+        """Test the stack blur approximation has a Gaussian-like width."""
+        from energetic_detector import _fast_gaussian_smooth
+        
+        impulse = np.zeros((101, 101), dtype=np.float32)
+        impulse[50, 50] = 1.0
+        response = _fast_gaussian_smooth(impulse, 5)[50]
+        
+        offsets = np.arange(101) - 50
+        width = np.sqrt((response * offsets ** 2).sum() / response.sum())
+        self.assertAlmostEqual(width, 5.0, delta=0.25)
+        self.assertEqual(np.argmax(response), 50)
+    
     def test_video_analysis(self):
         """Test full video analysis."""
         detector = EnergeticEpicenterDetector(
@@ -146,6 +415,131 @@ class TestEnergeticDetector(unittest.TestCase):
         self.assertEqual(props['height'], 240)
         self.assertGreater(props['processed_frames'], 0)
     
+    def test_epicenters_array(self):
+        """Test the (N, 3) epicenter array mirrors the reported dicts."""
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            skip_frames=2
+        )
+        
+        results = detector.analyze_video(json_output=True)
+        array = detector.epicenters_array
+        
+        self.assertEqual(array.shape, (len(results['epicenters']), 3))
+        for row, ep in zip(array, results['epicenters']):
+            self.assertEqual((row[0], row[1], row[2]), (ep['x'], ep['y'], ep['score']))
+        self.assertTrue(np.all(np.diff(array[:, 2]) <= 0))
+    
+    def test_reset_reuses_detector(self):
+        """Test a reset detector matches a fresh one, also across resolutions."""
+        small_path = Path(self.temp_dir) / "small_video.avi"
+        out = cv2.VideoWriter(str(small_path), cv2.VideoWriter_fourcc(*'MJPG'), 10, (160, 120))
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        for i in range(10):
+            frame.fill(0)
+            cv2.circle(frame, (60, 70), 5 + 4 * i, (255, 255, 255), 2)
+            out.write(frame)
+        out.release()
+        
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir
+        )
+        detector.analyze_video(json_output=True)
+        
+        for path, skip_frames in ((small_path, 2), (self.test_video_path, 1)):
+            detector.reset(str(path), skip_frames=skip_frames)
+            self.assertIsNone(detector.energy_map)
+            
+            fresh = EnergeticEpicenterDetector(
+                str(path),
+                output_dir=self.temp_dir,
+                skip_frames=skip_frames
+            ).analyze_video(json_output=True)
+            self.assertEqual(detector.analyze_video(json_output=True), fresh)
+    
+    def test_downscaled_flow_analysis(self):
+        """Test flow at reduced resolution still reports full-resolution maps."""
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            flow_scale=0.5
+        )
+        
+        results = detector.analyze_video(json_output=True)
+        
+        self.assertEqual(detector.energy_map.shape, (240, 320))
+        self.assertEqual(results['video_properties']['width'], 320)
+        for ep in results['epicenters']:
+            self.assertLess(ep['x'], 320)
+            self.assertLess(ep['y'], 240)
+        
+        with self.assertRaises(ValueError):
+            EnergeticEpicenterDetector(
+                str(self.test_video_path),
+                output_dir=self.temp_dir,
+                flow_scale=0
+            )
+    
+    @unittest.skipUnless(energetic_detector.av is not None, "PyAV not installed")
+    def test_pyav_decoder(self):
+        """Test the PyAV decoder reads the same frames as OpenCV."""
+        for flow_scale in (1.0, 0.5):
+            results = [
+                EnergeticEpicenterDetector(
+                    str(self.test_video_path),
+                    output_dir=self.temp_dir,
+                    skip_frames=2,
+                    decoder=decoder,
+                    flow_scale=flow_scale
+                ).analyze_video(json_output=True)
+                for decoder in ('opencv', 'pyav')
+            ]
+            opencv, pyav = results
+            
+            self.assertEqual(pyav['video_properties'], opencv['video_properties'])
+            self.assertGreater(len(pyav['epicenters']), 0)
+            self.assertAlmostEqual(pyav['epicenters'][0]['x'],
+                                   opencv['epicenters'][0]['x'], delta=10)
+            self.assertAlmostEqual(pyav['epicenters'][0]['y'],
+                                   opencv['epicenters'][0]['y'], delta=10)
+    
+    def test_pyav_decoder_missing_file(self):
+        """Test the PyAV decoder reports unreadable files like OpenCV."""
+        if energetic_detector.av is None:
+            with self.assertRaises(ValueError):
+                EnergeticEpicenterDetector("missing.mp4", decoder='pyav')
+            return
+        
+        detector = EnergeticEpicenterDetector(
+            str(Path(self.temp_dir) / "missing.mp4"),
+            output_dir=self.temp_dir,
+            decoder='pyav'
+        )
+        with self.assertRaises(ValueError):
+            detector.analyze_video(json_output=True)
+    
+    def test_pipelined_analysis_matches_serial(self):
+        """Test threaded pipeline produces the same results as the serial loop."""
+        serial = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir,
+            skip_frames=0
+        ).analyze_video(json_output=True)
+        
+        for workers in (2, 3):
+            detector = EnergeticEpicenterDetector(
+                str(self.test_video_path),
+                output_dir=self.temp_dir,
+                skip_frames=0,
+                workers=workers
+            )
+            pipelined = detector.analyze_video(json_output=True)
+            
+            self.assertEqual(pipelined['video_properties'], serial['video_properties'])
+            self.assertEqual(pipelined['epicenters'], serial['epicenters'])
+    
     def test_epicenter_detection(self):
         """Test epicenter detection."""
         detector = EnergeticEpicenterDetector(
@@ -168,6 +562,35 @@ class TestEnergeticDetector(unittest.TestCase):
         top_epicenter = epicenters[0]
         self.assertAlmostEqual(top_epicenter['x'], 50, delta=10)
         self.assertAlmostEqual(top_epicenter['y'], 50, delta=10)
+        
+        # Results must stay JSON serializable for the --json output
+        self.assertIsInstance(top_epicenter['x'], int)
+        self.assertIsInstance(top_epicenter['y'], int)
+        json.dumps(epicenters)
+    
+    def test_epicenter_detection_top_k(self):
+        """Test top_k returns the highest-scoring epicenters in order."""
+        detector = EnergeticEpicenterDetector(
+            str(self.test_video_path),
+            output_dir=self.temp_dir
+        )
+        
+        energy_map = np.zeros((200, 200))
+        divergence_map = np.zeros((200, 200))
+        for i, (cx, cy) in enumerate([(30, 30), (100, 160), (170, 60)]):
+            energy_map[cy - 5:cy + 5, cx - 5:cx + 5] = 10.0 * (i + 1)
+            divergence_map[cy - 5:cy + 5, cx - 5:cx + 5] = 5.0
+        
+        all_epicenters = detector.detect_epicenters(energy_map, divergence_map)
+        top = detector.detect_epicenters(energy_map, divergence_map, top_k=2)
+        
+        self.assertEqual(top, all_epicenters[:2])
+        self.assertEqual(
+            detector.detect_epicenters(energy_map, divergence_map, top_k=1),
+            all_epicenters[:1]
+        )
+        self.assertAlmostEqual(top[0]['x'], 170, delta=5)
+        self.assertAlmostEqual(top[0]['y'], 60, delta=5)
 
 
 if __name__ == '__main__':
@@ -4,12 +4,12 @@ import unittest
 import tempfile
 import sys
 from pathlib import Path
-import cv2
-import numpy as np
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from tests._fixtures import get_test_video
+
 from epicenter_tool import EpicenterTool
 
 
@@ -18,27 +18,9 @@ class TestEpicenterTool(unittest.TestCase):
     
     @classmethod
     def setUpClass(cls):
-        """Create a synthetic test video."""
+        """Set up the shared synthetic test video and an output directory."""
         cls.temp_dir = tempfile.mkdtemp()
-        cls.test_video_path = Path(cls.temp_dir) / "test_video.mp4"
-        
-        # Create a simple test video
-        width, height = 320, 240
-        fps = 10
-        num_frames = 15
-        
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(cls.test_video_path), fourcc, fps, (width, height))
-        
-        cx, cy = width // 2, height // 2
-        
-        for i in range(num_frames):
-            frame = np.zeros((height, width, 3), dtype=np.uint8)
-            radius = 10 + i * 5
-            cv2.circle(frame, (cx, cy), radius, (255, 255, 255), 2)
-            out.write(frame)
-        
-        out.release()
+        cls.test_video_path = get_test_video()
     
     def test_tool_initialization(self):
         """Test tool can be initialized."""
@@ -60,6 +42,25 @@ class TestEpicenterTool(unittest.TestCase):
         self.assertIn('video_properties', results)
         self.assertIn('epicenters', results)
     
+    def test_analyze_video_subprocess(self):
+        """Test isolated analysis matches direct analysis and reuses its worker."""
+        with EpicenterTool(output_dir=self.temp_dir) as tool:
+            direct = tool.analyze_video(str(self.test_video_path), skip_frames=2)
+            isolated = tool.analyze_video(
+                str(self.test_video_path),
+                skip_frames=2,
+                use_subprocess=True
+            )
+            executor = tool._isolated_executor
+            
+            self.assertEqual(isolated, direct)
+            
+            with self.assertRaises(ValueError):
+                tool.analyze_video('/nonexistent/video.mp4', use_subprocess=True)
+            self.assertIs(tool._isolated_executor, executor)
+        
+        self.assertIsNone(tool._isolated_executor)
+    
     def test_get_top_epicenter(self):
         """Test getting the top epicenter."""
         tool = EpicenterTool(output_dir=self.temp_dir)
@@ -70,6 +71,14 @@ class TestEpicenterTool(unittest.TestCase):
             self.assertIn('x', top)
             self.assertIn('y', top)
             self.assertIn('score', top)
+            
+            results = tool.analyze_video(str(self.test_video_path), skip_frames=2)
+            self.assertEqual(top, results['epicenters'][0])
+        
+        # Both calls share one detector
+        detector = tool._detector
+        tool.analyze_video(str(self.test_video_path), skip_frames=3)
+        self.assertIs(tool._detector, detector)
     
     def test_format_for_llm(self):
         """Test LLM output formatting."""
@@ -115,6 +124,27 @@ class TestEpicenterTool(unittest.TestCase):
         
         # Second should have error
         self.assertIn('error', results[1])
+    
+    def test_batch_analyze_parallel(self):
+        """Test parallel batch analysis keeps input order and reports errors."""
+        tool = EpicenterTool(output_dir=self.temp_dir)
+        
+        # Analyze in-process first so worker start-up happens after the
+        # parent has initialized its OpenCV/Numba thread pools
+        tool.analyze_video(str(self.test_video_path), skip_frames=3)
+        
+        video_paths = [
+            '/nonexistent/video.mp4',
+            str(self.test_video_path),
+            str(self.test_video_path)
+        ]
+        
+        results = tool.batch_analyze(video_paths, skip_frames=3, max_workers=2)
+        
+        self.assertEqual(len(results), 3)
+        self.assertIn('error', results[0])
+        self.assertEqual(results[1]['video_path'], str(self.test_video_path))
+        self.assertEqual(results[1], results[2])
 
 
 if __name__ == '__main__':